@@ -6,23 +6,65 @@ Parses .stmx (XMILE XML) files and checks for required elements, feedback
 implementation, scenario design, and calibration.
 
 Usage:
-    python hw1_autograder.py submission.stmx [--json]
+    python hw1_autograder.py submission.stmx [submission2.stmx ...] [--json]
 """
 
-import xml.etree.ElementTree as ET
 import sys
 import json
 import re
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from typing import Optional
+from xml.parsers import expat
+
+try:
+    from lxml import etree as ET
+except ImportError:
+    ET = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 XMILE_NS = {'xmile': 'http://docs.oasis-open.org/xmile/ns/XMILE/v1.0'}
 
+_XMILE_URI = XMILE_NS['xmile']
+
+# Element tags, with and without the XMILE namespace
+_MODEL_TAGS = frozenset({f'{{{_XMILE_URI}}}model', 'model'})
+_VARIABLES_TAGS = frozenset({f'{{{_XMILE_URI}}}variables', 'variables'})
+_VAR_TAGS = {}
+for _var_type in ('stock', 'flow', 'aux'):
+    _VAR_TAGS[f'{{{_XMILE_URI}}}{_var_type}'] = _var_type
+    _VAR_TAGS[_var_type] = _var_type
+
+# Only these end events are reported by iterparse; everything else is skipped in C
+_ITERPARSE_TAGS = tuple(_VARIABLES_TAGS | _VAR_TAGS.keys())
+
+# Base model elements every submission needs, in README order
+_REQ_STOCKS = ('atmosphere', 'vegetation', 'som')
+_REQ_FLOWS = (
+    'gpp', 'autotrophic_respiration', 'litterfall',
+    'heterotrophic_respiration', 'emissions'
+)
+_REQ_AUXS = ('gpp_base', 'scenario', 'total_carbon', 'rmse')
+_REQ_STOCKS_SET = frozenset(_REQ_STOCKS)
+_REQ_FLOWS_SET = frozenset(_REQ_FLOWS)
+_REQ_AUXS_SET = frozenset(_REQ_AUXS)
+
+# Converters required by each feedback option
+_Q10_SET = frozenset({'q10', 'temperature', 't_ref'})
+_N_SET = frozenset({'available_n', 'kn'})
+
+# Spaces and hyphens in XMILE names become underscores
+_NAME_TABLE = str.maketrans({' ': '_', '-': '_'})
+
 
-@dataclass
+@dataclass(slots=True)
 class Variable:
     """Represents a Stella variable (stock, flow, or aux)."""
     name: str
@@ -30,9 +72,15 @@ class Variable:
     equation: str = ''
     inflows: list = field(default_factory=list)
     outflows: list = field(default_factory=list)
+    # Derived from equation in __post_init__; not part of equality
+    equation_lower: str = field(default='', init=False, repr=False, compare=False)
 
+    def __post_init__(self):
+        # Lowercased once here so checks don't re-allocate it per lookup
+        self.equation_lower = self.equation.lower()
 
-@dataclass
+
+@dataclass(slots=True)
 class CheckResult:
     """Result of a single check."""
     name: str
@@ -45,84 +93,191 @@ class CheckResult:
 def normalize_name(name: str) -> str:
     """Normalize variable names for comparison (spaces to underscores, case-insensitive)."""
     # XMILE uses spaces in names, but equations use underscores
-    return name.lower().strip().replace(' ', '_').replace('-', '_')
-
-
-def find_child(parent, tag: str):
-    """Find child element trying with and without namespace."""
-    elem = parent.find(f'xmile:{tag}', XMILE_NS)
-    if elem is None:
-        elem = parent.find(tag)
-    return elem
-
+    return sys.intern(name.lower().strip().translate(_NAME_TABLE))
+
+
+def _local_name(tag) -> str:
+    """Strip the namespace from an element tag ('' for comments and PIs)."""
+    if not isinstance(tag, str):
+        return ''
+    return tag.rsplit('}', 1)[-1]
+
+
+def _build_var(elem, var_type: str) -> Variable:
+    """Build a Variable from a stock/flow/aux element in one pass over its children."""
+    equation = None
+    inflows = []
+    outflows = []
+    for child in elem:
+        child_tag = _local_name(child.tag)
+        if child_tag == 'eqn':
+            if equation is None:
+                equation = child.text or ''
+        elif var_type != 'stock':
+            continue
+        elif child_tag == 'inflow' and child.text:
+            inflows.append(child.text)
+        elif child_tag == 'outflow' and child.text:
+            outflows.append(child.text)
+
+    return Variable(name=elem.get('name', ''), var_type=var_type,
+                    equation=equation or '', inflows=inflows, outflows=outflows)
+
+
+class _ExpatVariableReader:
+    """expat callbacks that collect Variables without building a tree."""
+
+    def __init__(self):
+        self.pairs = []  # (normalized name, Variable)
+        self.found = False
+        self.stack = []  # tags of the currently open elements
+        self.var_type = None
+        self.var_depth = 0
+        self.name = ''
+        self.equation = None
+        self.inflows = []
+        self.outflows = []
+        self.child_tag = None  # eqn/inflow/outflow being buffered
+        self.child_text_done = False  # set once a nested element opens
+        self.buf = []
+
+    def start(self, name, attrs):
+        # With namespace_separator='}', 'uri}stock' becomes '{uri}stock'
+        tag = '{' + name if '}' in name else name
+        stack = self.stack
+
+        if self.var_type is not None:
+            if len(stack) == self.var_depth + 1:
+                self.child_tag = _local_name(tag)
+                self.child_text_done = False
+                self.buf = []
+            elif len(stack) == self.var_depth + 2:
+                # lxml's .text stops at the first nested element
+                self.child_text_done = True
+        elif (not self.found and tag in _VAR_TAGS and len(stack) >= 2
+              and stack[-1] in _VARIABLES_TAGS and stack[-2] in _MODEL_TAGS):
+            self.var_type = _VAR_TAGS[tag]
+            self.var_depth = len(stack)
+            self.name = attrs.get('name', '')
+            self.equation = None
+            self.inflows = []
+            self.outflows = []
+
+        stack.append(tag)
+
+    def end(self, name):
+        tag = self.stack.pop()
+        depth = len(self.stack)
+
+        if self.var_type is None:
+            if tag in _VARIABLES_TAGS and self.stack and self.stack[-1] in _MODEL_TAGS:
+                self.found = True
+            return
+
+        if depth == self.var_depth + 1:
+            text = ''.join(self.buf)
+            if self.child_tag == 'eqn':
+                if self.equation is None:
+                    self.equation = text
+            elif self.var_type == 'stock' and text:
+                if self.child_tag == 'inflow':
+                    self.inflows.append(text)
+                elif self.child_tag == 'outflow':
+                    self.outflows.append(text)
+            self.child_tag = None
+        elif depth == self.var_depth:
+            var = Variable(name=self.name, var_type=self.var_type,
+                           equation=self.equation or '',
+                           inflows=self.inflows, outflows=self.outflows)
+            self.pairs.append((normalize_name(var.name), var))
+            self.var_type = None
+
+    def data(self, text):
+        # Only the element's own text, matching lxml's .text
+        if (self.child_tag is not None and not self.child_text_done
+                and len(self.stack) == self.var_depth + 2):
+            self.buf.append(text)
+
+
+def _parse_stmx_expat(filepath: str) -> dict[str, Variable]:
+    """Parse variables with the stdlib expat parser (used when lxml is missing)."""
+    reader = _ExpatVariableReader()
+    parser = expat.ParserCreate(namespace_separator='}')
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    parser.CharacterDataHandler = reader.data
+
+    # The whole file is read so malformed XML anywhere is still reported
+    with open(filepath, 'rb') as f:
+        parser.ParseFile(f)
+
+    if not reader.found:
+        raise ValueError("Could not find variables element in STMX file")
 
-def find_all_children(parent, tag: str) -> list:
-    """Find all child elements trying with and without namespace."""
-    elems = parent.findall(f'xmile:{tag}', XMILE_NS)
-    if not elems:
-        elems = parent.findall(tag)
-    return elems
+    return dict(reader.pairs)
 
 
 def parse_stmx(filepath: str) -> dict[str, Variable]:
-    """Parse an .stmx file and extract all variables."""
-    tree = ET.parse(filepath)
-    root = tree.getroot()
-
-    variables = {}
-
-    # Find the model element
-    model = root.find('.//xmile:model', XMILE_NS)
-    if model is None:
-        model = root.find('.//model')
-
-    if model is None:
-        raise ValueError("Could not find model element in STMX file")
-
-    # Find variables container
-    vars_elem = find_child(model, 'variables')
-
-    if vars_elem is None:
+    """Parse an .stmx file and extract all variables.
+
+    The file is streamed and each stock/flow/aux is freed once read. The rest
+    of the file is still parsed so malformed XML anywhere is reported.
+    """
+    if ET is None:
+        return _parse_stmx_expat(filepath)
+
+    # Collected as pairs so the dict is built (and sized) once at the end
+    pairs = []
+    found = False
+
+    with open(filepath, 'rb') as f:
+        for _, elem in ET.iterparse(f, events=('end',), tag=_ITERPARSE_TAGS):
+            if found:
+                # Only the first model's variables count; keep the rest small
+                elem.clear(keep_tail=True)
+                continue
+
+            tag = elem.tag
+            parent = elem.getparent()
+
+            if tag in _VARIABLES_TAGS:
+                if parent is not None and parent.tag in _MODEL_TAGS:
+                    found = True
+                continue
+
+            var_type = _VAR_TAGS.get(tag)
+            if var_type is None:
+                continue
+
+            # Views reuse the stock/flow/aux tags for diagram symbols, so only
+            # children of the model's own <variables> block are collected
+            if parent is None or parent.tag not in _VARIABLES_TAGS:
+                continue
+            grandparent = parent.getparent()
+            if grandparent is None or grandparent.tag not in _MODEL_TAGS:
+                continue
+
+            var = _build_var(elem, var_type)
+            pairs.append((normalize_name(var.name), var))
+
+            # Free the element and any already-processed siblings
+            elem.clear(keep_tail=True)
+            while elem.getprevious() is not None:
+                del parent[0]
+
+    if not found:
         raise ValueError("Could not find variables element in STMX file")
 
-    # Parse stocks
-    for stock in find_all_children(vars_elem, 'stock'):
-        name = stock.get('name', '')
-        eqn_elem = find_child(stock, 'eqn')
-        equation = eqn_elem.text if eqn_elem is not None and eqn_elem.text else ''
-
-        inflows = []
-        outflows = []
-        for inflow in find_all_children(stock, 'inflow'):
-            if inflow.text:
-                inflows.append(inflow.text)
-        for outflow in find_all_children(stock, 'outflow'):
-            if outflow.text:
-                outflows.append(outflow.text)
-
-        var = Variable(name=name, var_type='stock', equation=equation,
-                      inflows=inflows, outflows=outflows)
-        variables[normalize_name(name)] = var
-
-    # Parse flows
-    for flow in find_all_children(vars_elem, 'flow'):
-        name = flow.get('name', '')
-        eqn_elem = find_child(flow, 'eqn')
-        equation = eqn_elem.text if eqn_elem is not None and eqn_elem.text else ''
-
-        var = Variable(name=name, var_type='flow', equation=equation)
-        variables[normalize_name(name)] = var
-
-    # Parse auxiliaries (converters)
-    for aux in find_all_children(vars_elem, 'aux'):
-        name = aux.get('name', '')
-        eqn_elem = find_child(aux, 'eqn')
-        equation = eqn_elem.text if eqn_elem is not None and eqn_elem.text else ''
+    return dict(pairs)
 
-        var = Variable(name=name, var_type='aux', equation=equation)
-        variables[normalize_name(name)] = var
 
-    return variables
+def _missing_of_type(variables: dict[str, Variable], required: tuple,
+                     required_set: frozenset, var_type: str) -> list[str]:
+    """Return the required names that are absent or not of var_type, in order."""
+    keys = variables.keys()
+    bad = required_set - keys
+    bad |= {name for name in required_set & keys if variables[name].var_type != var_type}
+    return [name for name in required if name in bad]
 
 
 def check_base_model(variables: dict[str, Variable]) -> list[CheckResult]:
@@ -130,11 +285,7 @@ def check_base_model(variables: dict[str, Variable]) -> list[CheckResult]:
     results = []
 
     # Required stocks
-    required_stocks = ['atmosphere', 'vegetation', 'som']
-    missing_stocks = []
-    for stock in required_stocks:
-        if stock not in variables or variables[stock].var_type != 'stock':
-            missing_stocks.append(stock)
+    missing_stocks = _missing_of_type(variables, _REQ_STOCKS, _REQ_STOCKS_SET, 'stock')
 
     if missing_stocks:
         results.append(CheckResult(
@@ -154,14 +305,7 @@ def check_base_model(variables: dict[str, Variable]) -> list[CheckResult]:
         ))
 
     # Required flows
-    required_flows = [
-        'gpp', 'autotrophic_respiration', 'litterfall',
-        'heterotrophic_respiration', 'emissions'
-    ]
-    missing_flows = []
-    for flow in required_flows:
-        if flow not in variables or variables[flow].var_type != 'flow':
-            missing_flows.append(flow)
+    missing_flows = _missing_of_type(variables, _REQ_FLOWS, _REQ_FLOWS_SET, 'flow')
 
     if missing_flows:
         results.append(CheckResult(
@@ -181,11 +325,7 @@ def check_base_model(variables: dict[str, Variable]) -> list[CheckResult]:
         ))
 
     # Required converters
-    required_auxs = ['gpp_base', 'scenario', 'total_carbon', 'rmse']
-    missing_auxs = []
-    for aux in required_auxs:
-        if aux not in variables or variables[aux].var_type != 'aux':
-            missing_auxs.append(aux)
+    missing_auxs = _missing_of_type(variables, _REQ_AUXS, _REQ_AUXS_SET, 'aux')
 
     if missing_auxs:
         results.append(CheckResult(
@@ -263,13 +403,13 @@ def check_calibration(variables: dict[str, Variable]) -> CheckResult:
 def check_feedback(variables: dict[str, Variable]) -> CheckResult:
     """Detect which feedback mechanism was implemented and verify correctness."""
 
+    keys = variables.keys()
+
     # Option A: Q10 temperature feedback
-    q10_elements = ['q10', 'temperature', 't_ref']
-    has_q10 = all(elem in variables for elem in q10_elements)
+    has_q10 = _Q10_SET <= keys
 
     # Option B: Nitrogen limitation
-    n_elements = ['available_n', 'kn']
-    has_n_limit = all(elem in variables for elem in n_elements)
+    has_n_limit = _N_SET <= keys
 
     # Option C: Deforestation
     has_deforestation = (
@@ -296,7 +436,7 @@ def check_feedback(variables: dict[str, Variable]) -> CheckResult:
         feedback_type = 'Option A: Q10 Temperature Feedback'
         # Check if Het_Resp uses Q10
         het_resp = variables.get('heterotrophic_respiration')
-        if het_resp and 'Q10' in het_resp.equation.upper():
+        if het_resp and 'q10' in het_resp.equation_lower:
             points += 10
             details.append('Het_Resp equation contains Q10')
         else:
@@ -304,7 +444,7 @@ def check_feedback(variables: dict[str, Variable]) -> CheckResult:
 
         # Check Temperature equation
         temp = variables.get('temperature')
-        if temp and 'atmosphere' in temp.equation.lower():
+        if temp and 'atmosphere' in temp.equation_lower:
             details.append('Temperature depends on Atmosphere')
         else:
             details.append('WARNING: Temperature should depend on Atmosphere')
@@ -313,7 +453,7 @@ def check_feedback(variables: dict[str, Variable]) -> CheckResult:
         feedback_type = 'Option B: Nitrogen Limitation'
         # Check if GPP uses nitrogen
         gpp = variables.get('gpp')
-        if gpp and 'available_n' in gpp.equation.lower():
+        if gpp and 'available_n' in gpp.equation_lower:
             points += 10
             details.append('GPP equation contains nitrogen term')
         else:
@@ -324,7 +464,7 @@ def check_feedback(variables: dict[str, Variable]) -> CheckResult:
         # Check Deforestation flow equation
         deforest = variables.get('deforestation')
         if deforest:
-            eq = deforest.equation.lower()
+            eq = deforest.equation_lower
             if 'vegetation' in eq and 'deforestation_rate' in eq:
                 points += 10
                 details.append('Deforestation flow properly defined')
@@ -352,12 +492,12 @@ def check_scenarios(variables: dict[str, Variable]) -> CheckResult:
             max_points=20
         )
 
-    emissions_eq = variables['emissions'].equation.upper()
+    emissions_eq = variables['emissions'].equation_lower
 
     # Check for IF/THEN logic
-    has_if = 'IF' in emissions_eq
-    has_then = 'THEN' in emissions_eq
-    has_scenario = 'SCENARIO' in emissions_eq
+    has_if = 'if' in emissions_eq
+    has_then = 'then' in emissions_eq
+    scenario_count = emissions_eq.count('scenario')
 
     if not (has_if and has_then):
         return CheckResult(
@@ -368,7 +508,7 @@ def check_scenarios(variables: dict[str, Variable]) -> CheckResult:
             max_points=20
         )
 
-    if not has_scenario:
+    if not scenario_count:
         return CheckResult(
             name='Scenario Design',
             passed=False,
@@ -378,7 +518,6 @@ def check_scenarios(variables: dict[str, Variable]) -> CheckResult:
         )
 
     # Check for multiple scenarios (should have multiple conditions)
-    scenario_count = emissions_eq.count('SCENARIO')
     if scenario_count >= 2:
         # Likely has at least 2-3 scenarios
         return CheckResult(
@@ -411,7 +550,7 @@ def check_mass_conservation(variables: dict[str, Variable]) -> CheckResult:
         )
 
     tc = variables['total_carbon']
-    eq = tc.equation.lower()
+    eq = tc.equation_lower
 
     # Check that it sums the three stocks
     has_atmosphere = 'atmosphere' in eq
@@ -450,8 +589,10 @@ def grade_submission(filepath: str) -> dict:
     try:
         variables = parse_stmx(filepath)
     except Exception as e:
+        # Return before any checks run; a bad file in a batch costs only the parse
         return {
             'success': False,
+            'filepath': filepath,
             'error': f'Failed to parse file: {e}',
             'score': 0,
             'max_score': 100,
@@ -486,15 +627,42 @@ def grade_submission(filepath: str) -> dict:
         'score': round(total_points, 1),
         'max_score': round(max_points, 1),
         'percentage': round(100 * total_points / max_points, 1) if max_points > 0 else 0,
-        'checks': [asdict(r) for r in all_results]
+        'checks': [
+            {
+                'name': r.name,
+                'passed': r.passed,
+                'message': r.message,
+                'points': r.points,
+                'max_points': r.max_points,
+            }
+            for r in all_results
+        ]
     }
 
 
-def print_report(report: dict):
-    """Print a human-readable report."""
+def dumps_report(report) -> str:
+    """Serialize a report (or list of reports) as indented JSON."""
+    if orjson is not None:
+        text = orjson.dumps(report, option=orjson.OPT_INDENT_2).decode()
+        # orjson writes raw UTF-8; json escapes non-ASCII (e.g. from student
+        # equations), which is also safe on non-UTF-8 consoles. Only use the
+        # fast path when the two agree.
+        if text.isascii():
+            return text
+    return json.dumps(report, indent=2)
+
+
+def print_report(report: dict, show_file: bool = False):
+    """Print a human-readable report.
+
+    show_file names the submission in error lines (used when grading a batch).
+    """
 
     if not report['success']:
-        print(f"ERROR: {report['error']}")
+        if show_file:
+            print(f"ERROR: {Path(report['filepath']).name}: {report['error']}")
+        else:
+            print(f"ERROR: {report['error']}")
         return
 
     print("=" * 60)
@@ -518,25 +686,33 @@ def main():
     parser = argparse.ArgumentParser(
         description='Autograder for HW1 Terrestrial Carbon Cycle Model'
     )
-    parser.add_argument('filepath', help='Path to .stmx file')
+    parser.add_argument('filepath', nargs='+',
+                       help='Path to .stmx file (several are graded in parallel)')
     parser.add_argument('--json', action='store_true',
                        help='Output results as JSON')
 
     args = parser.parse_args()
 
-    if not Path(args.filepath).exists():
-        print(f"Error: File not found: {args.filepath}")
-        sys.exit(1)
+    for filepath in args.filepath:
+        if not Path(filepath).exists():
+            print(f"Error: File not found: {filepath}")
+            sys.exit(1)
 
-    report = grade_submission(args.filepath)
+    if len(args.filepath) == 1:
+        reports = [grade_submission(args.filepath[0])]
+    else:
+        # Submissions are independent, so grade one per worker process
+        with ProcessPoolExecutor() as executor:
+            reports = list(executor.map(grade_submission, args.filepath))
 
     if args.json:
-        print(json.dumps(report, indent=2))
+        sys.stdout.write(dumps_report(reports[0] if len(reports) == 1 else reports) + '\n')
     else:
-        print_report(report)
+        for report in reports:
+            print_report(report, show_file=len(reports) > 1)
 
-    # Exit with non-zero if score below 60%
-    if report['success'] and report['percentage'] >= 60:
+    # Exit with non-zero if any score below 60%
+    if all(r['success'] and r['percentage'] >= 60 for r in reports):
         sys.exit(0)
     else:
         sys.exit(1)
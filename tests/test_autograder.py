@@ -0,0 +1,169 @@
+"""
+Unit tests for the HW1 autograder itself.
+
+These use small XMILE documents written to a temporary directory and never
+look at the student's submission.
+"""
+
+import json
+import pytest
+from types import SimpleNamespace
+from xml.parsers.expat import ExpatError
+import hw1_autograder
+from hw1_autograder import Variable, check_base_model, check_scenarios, dumps_report, \
+    parse_stmx, _parse_stmx_expat
+
+PARSE_ERRORS = (ExpatError,)
+if hw1_autograder.ET is not None:
+    PARSE_ERRORS += (hw1_autograder.ET.ParseError,)
+
+
+XMILE_HEADER = '<xmile version="1.0" xmlns="http://docs.oasis-open.org/xmile/ns/XMILE/v1.0">'
+
+NAMESPACED = XMILE_HEADER + '''
+<model><variables>
+  <stock name="Atmosphere"><eqn>600</eqn><inflow>Emissions</inflow><outflow>GPP</outflow></stock>
+  <flow name="GPP"><eqn>GPP_base * Atmosphere / 600</eqn></flow>
+  <aux name="GPP base"><eqn>110</eqn></aux>
+  <aux name="Threshold"><eqn>IF x &lt; 1 THEN <![CDATA[2 & 3]]> ELSE 4</eqn></aux>
+</variables></model>
+</xmile>'''
+
+BARE = '''<xmile><model><variables>
+  <stock name="SOM"><eqn>1500</eqn><inflow>Litterfall</inflow></stock>
+  <aux name="tau-som"><eqn>30</eqn></aux>
+</variables></model></xmile>'''
+
+NESTED_TEXT = XMILE_HEADER + '''
+<model><variables><aux name="a"><eqn>a<b/>tail</eqn></aux></variables></model>
+</xmile>'''
+
+VIEWS = XMILE_HEADER + '''
+<model>
+  <variables>
+    <stock name="Vegetation"><eqn>550</eqn></stock>
+    <flow name="Litterfall"><eqn>Vegetation / 10</eqn></flow>
+  </variables>
+  <views><view>
+    <stock x="1" y="2" name="Vegetation"/>
+    <flow x="3" y="4" name="Litterfall"><pts><pt x="1" y="2"/></pts></flow>
+    <aux x="5" y="6" name="Only in view"/>
+  </view></views>
+</model>
+</xmile>'''
+
+TWO_MODELS = XMILE_HEADER + '''
+<sim_specs><variables><aux name="not a model var"/></variables></sim_specs>
+<model><variables><aux name="first"><eqn>1</eqn></aux></variables></model>
+<model name="module"><variables><aux name="second"><eqn>2</eqn></aux></variables></model>
+</xmile>'''
+
+TRAILING_MALFORMED = XMILE_HEADER + '''
+<model><variables><aux name="a"><eqn>1</eqn></aux></variables></model><oops>
+</xmile>'''
+
+
+@pytest.fixture
+def write_stmx(tmp_path):
+    """Write an XMILE string to a temporary .stmx file and return its path."""
+    def write(text: str) -> str:
+        path = tmp_path / 'model.stmx'
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+
+class TestParsers:
+    """parse_stmx and the expat fallback should read files identically."""
+
+    @pytest.mark.parametrize("text, expected", [
+        (NAMESPACED, {'atmosphere': '600', 'gpp': 'GPP_base * Atmosphere / 600',
+                      'gpp_base': '110', 'threshold': 'IF x < 1 THEN 2 & 3 ELSE 4'}),
+        (BARE, {'som': '1500', 'tau_som': '30'}),
+        (NESTED_TEXT, {'a': 'a'}),
+        (VIEWS, {'vegetation': '550', 'litterfall': 'Vegetation / 10'}),
+        (TWO_MODELS, {'first': '1'}),
+    ], ids=['namespaced', 'bare', 'nested_text', 'views', 'two_models'])
+    def test_parsers_agree(self, write_stmx, text, expected):
+        """Both parsers collect the same model variables and equations."""
+        path = write_stmx(text)
+        variables = parse_stmx(path)
+        assert {k: v.equation for k, v in variables.items()} == expected
+        assert _parse_stmx_expat(path) == variables
+
+    def test_stock_flows(self, write_stmx):
+        """Stock inflows and outflows are read by both parsers."""
+        path = write_stmx(NAMESPACED)
+        for parse in (parse_stmx, _parse_stmx_expat):
+            atmosphere = parse(path)['atmosphere']
+            assert atmosphere.inflows == ['Emissions']
+            assert atmosphere.outflows == ['GPP']
+
+    @pytest.mark.parametrize("parse", [parse_stmx, _parse_stmx_expat])
+    def test_trailing_malformed_xml_is_an_error(self, write_stmx, parse):
+        """Malformed XML after the model still fails the parse."""
+        with pytest.raises(PARSE_ERRORS):
+            parse(write_stmx(TRAILING_MALFORMED))
+
+    @pytest.mark.parametrize("parse", [parse_stmx, _parse_stmx_expat])
+    def test_missing_variables_is_an_error(self, write_stmx, parse):
+        """A model without <variables> is rejected."""
+        with pytest.raises(ValueError):
+            parse(write_stmx('<xmile><model/></xmile>'))
+
+
+class TestBaseModel:
+    """check_base_model should report missing elements in README order."""
+
+    def test_missing_names_keep_required_order(self):
+        """Absent and wrong-type names are listed in the order of the README."""
+        variables = {
+            'atmosphere': Variable(name='Atmosphere', var_type='stock'),
+            'som': Variable(name='SOM', var_type='aux'),
+            'litterfall': Variable(name='Litterfall', var_type='flow'),
+        }
+        stocks, flows, _ = check_base_model(variables)
+        assert stocks.message == 'Missing stocks: vegetation, som'
+        assert flows.message == ('Missing flows: gpp, autotrophic_respiration, '
+                                 'heterotrophic_respiration, emissions')
+
+
+class TestScenarios:
+    """check_scenarios should accept the equation forms Stella allows."""
+
+    @pytest.mark.parametrize("equation", [
+        'IF Scenario = 1 THEN 10 ELSE IF Scenario = 2 THEN 5 ELSE 0',
+        'IF_THEN_ELSE(Scenario = 1, 10, IF_THEN_ELSE(Scenario=2, 5, 0))',
+        'IF Scenario_Choice = 1 THEN 10 ELSE IF Scenario_Choice = 2 THEN 5 ELSE 0',
+    ])
+    def test_scenario_equation_forms_get_full_credit(self, equation):
+        """IF/THEN and Scenario are matched as substrings, as Stella names allow."""
+        emissions = Variable(name='Emissions', var_type='flow', equation=equation)
+        result = check_scenarios({'emissions': emissions})
+        assert result.points == result.max_points, result.message
+
+
+class TestDumpsReport:
+    """dumps_report should match json.dumps(indent=2) with or without orjson."""
+
+    @staticmethod
+    def fake_orjson(calls):
+        """Stand-in for orjson: indented JSON as raw UTF-8 bytes."""
+        def dumps(obj, option=None):
+            calls.append(option)
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+        return SimpleNamespace(OPT_INDENT_2=object(), dumps=dumps)
+
+    @pytest.mark.parametrize("message", ['All 3 stocks present', 'caf\u00e9 \u2713'],
+                             ids=['ascii', 'non_ascii'])
+    @pytest.mark.parametrize("use_orjson", [True, False], ids=['orjson', 'json'])
+    def test_matches_json_dumps(self, monkeypatch, message, use_orjson):
+        """Output is identical to json.dumps, escaping non-ASCII either way."""
+        calls = []
+        monkeypatch.setattr(hw1_autograder, 'orjson',
+                            self.fake_orjson(calls) if use_orjson else None)
+        report = {'success': True, 'score': 95, 'percentage': 95.0,
+                  'checks': [{'name': 'Check', 'message': message, 'points': 4.5}]}
+
+        assert dumps_report(report) == json.dumps(report, indent=2)
+        assert len(calls) == (1 if use_orjson else 0)